@@ -5,288 +5,576 @@
 生成 version_map.json 文件供应用使用
 """
 
+import atexit
 import json
+import logging
 import re
-from typing import Dict, List, Tuple
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+import sys
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import httpx
 from bs4 import BeautifulSoup
-import time
 
-def fetch_pack_format_table() -> List[Tuple[int, str]]:
+# 优先使用 C 实现的 lxml 解析器，未安装时退回内置的 html.parser
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+# 优先使用 C 实现的 orjson 写出 JSON，未安装时退回标准库 json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# HTTP/2 需要额外安装 h2（pip install httpx[http2]），未安装时使用 HTTP/1.1
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+SCRIPT_DIR = Path(__file__).parent
+VERSION_MAP_FILE = SCRIPT_DIR / "version_map.json"
+
+# 条件请求缓存（ETag / Last-Modified + 解析结果）
+# 放在仓库根目录的 .cache 下，public/ 中的文件会被 vite 原样打包进应用
+CACHE_DIR = SCRIPT_DIR.parent.parent / ".cache" / "version_map"
+API_CACHE_FILE = CACHE_DIR / "pack_format_api.json"
+PAGE_CACHE_FILE = CACHE_DIR / "pack_format_page.json"
+
+# 缓存格式版本：缓存中保存的是解析结果，修改解析逻辑时必须加一，
+# 否则服务器返回 304 时会一直沿用旧解析器的输出
+CACHE_VERSION = 3
+
+WIKI_PAGE_URL = "https://minecraft.wiki/w/Pack_format"
+WIKI_API_URL = "https://minecraft.wiki/api.php"
+
+# action=render 只返回正文 HTML，不含皮肤、导航栏以及样式和脚本引用
+WIKI_PAGE_PARAMS = {'action': 'render'}
+
+# 只取页面源码（wikitext），体积比渲染后的 HTML 小得多
+WIKI_API_PARAMS = {
+    'action': 'parse',
+    'page': 'Pack_format',
+    'prop': 'wikitext',
+    'format': 'json',
+}
+
+# 请求头（带上浏览器 User-Agent，避免被 Wiki 拦截）
+REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+}
+
+# 超时：连接 5 秒、读取 15 秒，连不上时尽快放弃，转用下一个数据来源
+REQUEST_TIMEOUT = httpx.Timeout(15, connect=5)
+
+# API 和页面都在同一个域名下，共用一个客户端以复用 TCP/TLS 连接
+# 开启 HTTP/2 后多个请求可以在同一条连接上并发
+CLIENT = httpx.Client(
+    http2=HTTP2_AVAILABLE,
+    headers=REQUEST_HEADERS,
+    timeout=REQUEST_TIMEOUT,
+    follow_redirects=True,
+)
+atexit.register(CLIENT.close)
+
+# 版本文本中的连续空白
+_WS_RE = re.compile(r'\s+')
+
+# pack_format 单元格开头的整数（忽略 ".0" 小数部分和脚注标记）
+_PACK_FORMAT_RE = re.compile(r'^\d+')
+
+# wikitext 解析用的正则
+_WIKITABLE_RE = re.compile(r'^\s*\{\|([^\n]*)\n(.*?)^\s*\|\}', re.M | re.S)  # {| class="wikitable" ... |}
+_HEADER_SEP_RE = re.compile(r'!!|\|\|')  # 表头单元格分隔符
+_CELL_ATTR_RE = re.compile(r'^([^|\[\]{}<]*=[^|\[\]{}<]*)\|')  # 单元格属性，如 rowspan=3 |
+_ROWSPAN_RE = re.compile(r'rowspan\s*=\s*"?(\d+)')
+_COLSPAN_RE = re.compile(r'colspan\s*=\s*"?(\d+)')
+_REF_RE = re.compile(r'<!--.*?-->|<ref[^>]*/>|<ref[^>]*>.*?</ref>', re.S)  # 注释和脚注
+_TAG_RE = re.compile(r'<[^>]+>')
+_TEMPLATE_RE = re.compile(r'\{\{([^{}]*)\}\}')
+_LINK_RE = re.compile(r'\[\[(?:[^\]|]*\|)?([^\]|]*)\]\]')  # [[目标|文本]] -> 文本
+
+# 已知模板的展开方式（模板名不区分大小写）
+# 显示最后一个位置参数的模板（版本链接等），如 {{JE|1.21.6}} -> 1.21.6
+_LAST_ARG_TEMPLATES = {'je', 'java edition', 'nowrap', 'nobr', 'code', 'mono'}
+# 显示第一个位置参数的模板，如 {{tooltip|1.20|说明}} -> 1.20
+_FIRST_ARG_TEMPLATES = {'tooltip'}
+# 脚注类模板，整个去掉
+_FOOTNOTE_TEMPLATES = {'efn', 'note', 'fn', 'ref', 'cite', 'cite web', 'citation needed', 'cn'}
+
+# 未知模板替换成的标记，所在行会被视为解析失败
+UNRECOGNISED_TEMPLATE = '\ufffd'
+
+def template_display_text(match: re.Match) -> str:
+    """
+    按模板名展开模板：版本链接类显示参数，脚注类去掉
+    未知模板无法确定显示内容，替换为 UNRECOGNISED_TEMPLATE
+    """
+    name, *params = match.group(1).split('|')
+    name = name.strip().lower().replace('_', ' ')
+    args = [arg.strip() for arg in params if '=' not in arg]
+    
+    if name in _FOOTNOTE_TEMPLATES:
+        return ''
+    if name in _LAST_ARG_TEMPLATES and args:
+        return args[-1]
+    if name in _FIRST_ARG_TEMPLATES and args:
+        return args[0]
+    return UNRECOGNISED_TEMPLATE
+
+def clean_wikitext(text: str) -> str:
+    """
+    去掉 wikitext 中的脚注、模板、标签和链接标记，只保留显示文本
+    """
+    text = _REF_RE.sub('', text)
+    
+    # 先展开链接，避免链接中的 | 被当成模板参数分隔符
+    text = _LINK_RE.sub(r'\1', text)
+    
+    # 模板可能嵌套，由内向外逐层展开
+    count = 1
+    while count:
+        text, count = _TEMPLATE_RE.subn(template_display_text, text)
+    
+    text = _TAG_RE.sub(' ', text)
+    text = text.replace("'''", '').replace("''", '')
+    return text.strip()
+
+def parse_wikitext_cell(cell: str) -> Tuple[str, int, int]:
     """
-    从 Minecraft Wiki 抓取 pack_format 表格（使用无头浏览器）
-    返回: [(pack_format, version_range), ...]
+    解析单个 wikitext 单元格
+    返回: (文本, rowspan, colspan)
     """
-    url = "https://minecraft.wiki/w/Pack_format"
+    rowspan = colspan = 1
+    match = _CELL_ATTR_RE.match(cell)
+    if match:
+        rowspan_match = _ROWSPAN_RE.search(match.group(1))
+        if rowspan_match:
+            rowspan = max(int(rowspan_match.group(1)), 1)
+        colspan_match = _COLSPAN_RE.search(match.group(1))
+        if colspan_match:
+            colspan = max(int(colspan_match.group(1)), 1)
+        cell = cell[match.end():]
+    return clean_wikitext(cell), rowspan, colspan
+
+def parse_wikitext_rows(body: str) -> List[List[Tuple[str, int, int]]]:
+    """
+    把 wikitext 表格内容拆成行
+    返回: [[(文本, rowspan, colspan), ...], ...]，第一行为表头
+    """
+    rows = [[]]
+    for line in body.split('\n'):
+        line = line.strip()
+        
+        # 跳过空行和表格标题
+        if not line or line.startswith('|+'):
+            continue
+        
+        if line.startswith('|-'):
+            # 新的一行
+            rows.append([])
+        elif line.startswith('!'):
+            rows[-1].extend(parse_wikitext_cell(cell) for cell in _HEADER_SEP_RE.split(line[1:]))
+        elif line.startswith('|'):
+            rows[-1].extend(parse_wikitext_cell(cell) for cell in line[1:].split('||'))
+        elif rows[-1]:
+            # 单元格内容跨多行，接到上一个单元格后面
+            text, rowspan, colspan = rows[-1][-1]
+            rows[-1][-1] = (f"{text} {clean_wikitext(line)}".strip(), rowspan, colspan)
+    
+    return [row for row in rows if row]
+
+def unroll_spans(rows: List[List[Tuple[str, int, int]]]) -> List[List[Tuple[str, int]]]:
+    """
+    展开 rowspan 和 colspan，让每一行都拥有完整的列
+    被跨行、跨列覆盖的位置填入该单元格的文本
+    返回: [[(文本, 单元格起始列), ...], ...]，起始列与所在列不同说明是跨列单元格的延续
+    """
+    grid = []
+    pending = {}  # 列索引 -> (文本, 起始列, 剩余需要填充的行数)
     
-    print(f"正在使用无头浏览器访问: {url}")
+    for cells in rows:
+        row = []
+        queue = list(cells)
+        col = 0
+        
+        while queue or any(c >= col for c in pending):
+            if col in pending:
+                # 该列被上方的 rowspan 单元格占用
+                text, start_col, remaining = pending[col]
+                if remaining > 1:
+                    pending[col] = (text, start_col, remaining - 1)
+                else:
+                    del pending[col]
+                row.append((text, start_col))
+                col += 1
+            elif queue:
+                # 跨列单元格占用的每一列都带上同样的 rowspan
+                text, rowspan, colspan = queue.pop(0)
+                start_col = col
+                for _ in range(colspan):
+                    if rowspan > 1:
+                        pending[col] = (text, start_col, rowspan - 1)
+                    row.append((text, start_col))
+                    col += 1
+            else:
+                row.append(('', col))
+                col += 1
+        
+        grid.append(row)
     
-    driver = None
+    return grid
+
+def html_span(cell, attr: str) -> int:
+    """
+    读取 HTML 单元格的 rowspan / colspan 属性，缺失或非法时视为 1
+    """
     try:
-        # 配置Chrome选项
-        chrome_options = Options()
-        chrome_options.add_argument('--headless')  # 无头模式
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--disable-gpu')
-        chrome_options.add_argument('--window-size=1920,1080')
-        chrome_options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+        return max(int(cell.get(attr, 1)), 1)
+    except (TypeError, ValueError):
+        return 1
+
+def collect_pack_formats(grid: List[List[Tuple[str, int]]], pack_format_mappings: Dict[int, List[str]]) -> bool:
+    """
+    从展开 rowspan / colspan 后的表格中读取版本和 Resource pack format，按 pack_format 归组
+    表格结构固定为：[Client version, Resource pack format, Data pack format]
+    返回: 是否所有带 pack_format 的行都读到了版本（且没有未知模板）
+    """
+    version_col_idx = 0  # 版本总是第一列
+    resource_pack_col_idx = 1  # Resource pack format总是第二列
+    complete = True
+    
+    for row_idx, row in enumerate(grid):
+        if len(row) <= resource_pack_col_idx:
+            continue
+        
+        texts = [text for text, _ in row]
         
-        # 创建WebDriver
-        print("正在启动Chrome浏览器...")
-        driver = webdriver.Chrome(options=chrome_options)
+        # 清理版本文本
+        version_text = _WS_RE.sub(' ', texts[version_col_idx]).replace('Java Edition ', '')
+        pack_format_str = texts[resource_pack_col_idx]
         
-        # 访问页面
-        driver.get(url)
+        # 含有未知模板时无法确定单元格的真实内容
+        if UNRECOGNISED_TEMPLATE in version_text or UNRECOGNISED_TEMPLATE in pack_format_str:
+            logger.warning("[行%d] 单元格中有无法识别的模板: %s", row_idx + 1, texts)
+            complete = False
+            continue
         
-        # 等待页面加载
-        print("等待页面加载...")
-        time.sleep(3)
+        # Resource pack format 列被左侧的跨列单元格占据（如版本单元格 colspan=2），这一行没有该值
+        if row[resource_pack_col_idx][1] != resource_pack_col_idx:
+            logger.debug("[行%d] Resource pack format 列被跨列单元格占据，跳过: %s", row_idx + 1, texts)
+            continue
         
-        # 获取页面源代码
-        page_source = driver.page_source
-        soup = BeautifulSoup(page_source, 'html.parser')
+        # 跳过空行
+        if not pack_format_str:
+            continue
         
-    except Exception as e:
-        print(f"浏览器访问失败: {e}")
-        print("使用备用数据...")
-        if driver:
-            driver.quit()
-        return get_fallback_data()
-    finally:
-        if driver:
-            driver.quit()
+        # 只取开头的整数，如 "18.0" -> 18，"5 [a]" -> 5
+        pack_format_match = _PACK_FORMAT_RE.match(pack_format_str)
+        if not pack_format_match:
+            # 无法解析为数字，可能是表头或其他内容
+            logger.debug(
+                "[行%d] %s\n  单元格: %s\n  ✗ 无法解析pack_format='%s'，跳过",
+                row_idx + 1, version_text, texts, pack_format_str
+            )
+            continue
+        pack_format = int(pack_format_match.group())
+        
+        # 有 pack_format 却没有版本，说明版本单元格的格式没能识别
+        if not version_text:
+            logger.warning("[行%d] 未能识别版本（pack_format=%d），单元格: %s", row_idx + 1, pack_format, texts)
+            complete = False
+            continue
+        
+        logger.debug("[行%d] %s -> pack_format %d", row_idx + 1, version_text, pack_format)
+        pack_format_mappings[pack_format].append(version_text)
+    
+    return complete
+
+def load_http_cache(cache_file: Path) -> Dict:
+    """
+    读取上次成功解析时缓存的 ETag / Last-Modified 和解析结果
+    缓存不存在、损坏或由旧版本解析器生成时返回空字典（下次请求不带条件头）
+    """
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        if cache.get('version') != CACHE_VERSION:
+            return {}
+        cache['mappings'] = {
+            int(pack_format): versions for pack_format, versions in cache['mappings'].items()
+        }
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return {}
+    return cache if cache['mappings'] else {}
+
+def save_http_cache(cache_file: Path, response: httpx.Response, pack_format_mappings: Dict[int, List[str]]):
+    """
+    保存响应的 ETag / Last-Modified 以及从该响应解析出的结果
+    只在解析成功后调用，保证 304 时复用的一定是这份内容的解析结果
+    """
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        with open(cache_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': CACHE_VERSION,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'mappings': {str(pack_format): versions for pack_format, versions in pack_format_mappings.items()},
+            }, f, ensure_ascii=False)
+    except OSError as e:
+        logger.warning("写入缓存失败: %s", e)
+
+def conditional_get(url: str, cache: Dict, params: Optional[Dict[str, str]] = None) -> Optional[httpx.Response]:
+    """
+    带 If-None-Match / If-Modified-Since 的条件请求
+    返回: 响应对象；服务器返回 304（内容未变化）时返回 None
+    """
+    headers = {}
+    if cache.get('etag'):
+        headers['If-None-Match'] = cache['etag']
+    if cache.get('last_modified'):
+        headers['If-Modified-Since'] = cache['last_modified']
+    
+    response = CLIENT.get(url, params=params, headers=headers)
+    if response.status_code == 304 and cache:
+        return None
+    response.raise_for_status()
+    return response
+
+def fetch_from_wiki_api() -> Dict[int, List[str]]:
+    """
+    通过 MediaWiki API 获取 wikitext 并解析 pack_format 表格
+    返回: {pack_format: [version, ...]}，失败时返回空字典
+    """
+    logger.info("正在通过 API 获取 wikitext: %s", WIKI_API_URL)
+    
+    cache = load_http_cache(API_CACHE_FILE)
+    try:
+        response = conditional_get(WIKI_API_URL, cache, params=WIKI_API_PARAMS)
+        if response is None:
+            logger.info("wikitext 未变化，沿用上次的解析结果")
+            return cache['mappings']
+        wikitext = response.json()['parse']['wikitext']['*']
+    except httpx.HTTPError as e:
+        logger.warning("API 访问失败: %s", e)
+        return {}
+    except (ValueError, KeyError) as e:
+        logger.warning("API 返回格式异常: %s", e)
+        return {}
+    
+    pack_format_mappings = defaultdict(list)
+    
+    for table_match in _WIKITABLE_RE.finditer(wikitext):
+        if 'wikitable' not in table_match.group(1):
+            continue
+        
+        rows = parse_wikitext_rows(table_match.group(2))
+        if not rows:
+            continue
+        
+        # 确认这是正确的表格（包含Client version）
+        header_texts = [text for text, _, _ in rows[0]]
+        if 'Client version' not in ' '.join(header_texts):
+            continue
+        
+        logger.debug("找到正确的表格！表头: %s", header_texts)
+        
+        # wikitext 明确标注了 rowspan / colspan，展开后每行都是 [Client version, Resource pack format, Data pack format]
+        if not collect_pack_formats(unroll_spans(rows[1:]), pack_format_mappings):
+            # 部分版本丢失时不使用 wikitext 的结果，交给页面抓取
+            logger.warning("wikitext 中有无法识别的单元格")
+            return {}
+    
+    logger.info("wikitext 解析完成，共 %d 个pack_format组", len(pack_format_mappings))
+    if pack_format_mappings:
+        save_http_cache(API_CACHE_FILE, response, pack_format_mappings)
+    return pack_format_mappings
+
+def fetch_from_wiki_page() -> Dict[int, List[str]]:
+    """
+    抓取渲染后的 Wiki 页面并解析 pack_format 表格
+    返回: {pack_format: [version, ...]}，失败时返回空字典
+    """
+    logger.info("正在访问: %s", WIKI_PAGE_URL)
+    
+    cache = load_http_cache(PAGE_CACHE_FILE)
+    try:
+        # Wiki 页面在服务端渲染，直接请求 HTML 即可拿到完整表格
+        response = conditional_get(WIKI_PAGE_URL, cache, params=WIKI_PAGE_PARAMS)
+    except httpx.HTTPError as e:
+        logger.warning("页面访问失败: %s", e)
+        return {}
+    
+    if response is None:
+        logger.info("页面未变化，沿用上次的解析结果")
+        return cache['mappings']
+    
+    soup = BeautifulSoup(response.text, HTML_PARSER)
     
     # 查找包含 Resource pack format 的表格
-    pack_format_mappings = {}  # 使用字典来合并相同pack_format的版本
+    pack_format_mappings = defaultdict(list)  # 使用字典来合并相同pack_format的版本
     
-    # 查找特定的表格：class="wikitable sortable jquery-tablesorter"
-    tables = soup.find_all('table', class_='wikitable sortable jquery-tablesorter')
+    # 查找同时带有 wikitable 和 sortable 类的表格
+    # （CSS 选择器按类名子集匹配，不受 jquery-tablesorter 等额外类的影响）
+    tables = soup.select('table.wikitable.sortable')
     
-    print(f"找到 {len(tables)} 个sortable表格")
+    logger.debug("找到 %d 个sortable表格", len(tables))
     
     for table_idx, table in enumerate(tables):
-        print(f"\n检查表格 {table_idx + 1}...")
+        logger.debug("检查表格 %d...", table_idx + 1)
         
         # 查找表头
-        header_row = table.find('tr')
+        header_row = table.select_one('tr')
         if not header_row:
             continue
             
         headers = header_row.find_all('th')
         header_texts = [h.get_text().strip() for h in headers]
         
-        print(f"表头: {header_texts}")
+        logger.debug("表头: %s", header_texts)
         
         # 确认这是正确的表格（包含Client version）
         if 'Client version' not in ' '.join(header_texts):
-            print("不包含Client version，跳过")
+            logger.debug("不包含Client version，跳过")
             continue
         
-        print(f"找到正确的表格！")
+        logger.debug("找到正确的表格！")
         
-        # 由于rowspan的复杂性，我们采用简单策略：
-        # 表格结构固定为：[Client version, Resource pack format, Data pack format]
-        # 我们总是读取第二个<td>（索引1）作为Resource pack format
-        # 因为Resource pack format永远在Data pack format之前
-        
-        version_col_idx = 0  # 版本总是第一列
-        resource_pack_col_idx = 1  # Resource pack format总是第二列
-        
-        print(f"使用固定列索引 - 版本: {version_col_idx}, Resource pack format: {resource_pack_col_idx}")
+        # 去掉脚注标记（如 <sup class="reference">[a]</sup>），避免混进单元格文本
+        for reference in table.select('sup.reference'):
+            reference.decompose()
         
         # 遍历表格行
-        rows = table.find_all('tr')[1:]  # 跳过表头
-        current_pack_format = None
+        # 跳过表头行，以及嵌套在单元格里的其他表格的行
+        rows = [
+            row for row in table.find_all('tr')
+            if row is not header_row and row.find_parent('table') is table
+        ]
         
-        print(f"表格共有 {len(rows)} 行数据")
-        print(f"开始解析...")
+        logger.debug("表格共有 %d 行数据，开始解析...", len(rows))
         
-        for row_idx, row in enumerate(rows):
-            cells = row.find_all(['td', 'th'])
-            
-            # 至少需要有版本列
-            if len(cells) < 1:
-                continue
-            
-            try:
-                # 获取版本信息（第一列，索引0）
-                version_cell = cells[0]
-                version_text = version_cell.get_text().strip()
-                
-                # 清理版本文本
-                version_text = re.sub(r'\s+', ' ', version_text)
-                version_text = version_text.replace('Java Edition ', '')
-                
-                # 跳过空行
-                if not version_text:
-                    continue
-                
-                # 获取Resource pack format
-                # 策略：总是尝试读取第二个<td>（索引1）
-                
-                old_pack_format = current_pack_format
-                
-                if len(cells) > 1:
-                    # 有第二个<td>，需要判断它是Resource pack format还是Data pack format
-                    pack_format_cell = cells[1]
-                    pack_format_str = pack_format_cell.get_text().strip()
-                    
-                    if pack_format_str:
-                        try:
-                            # 转换为整数（去掉小数部分）
-                            pack_format_float = float(pack_format_str)
-                            new_pack_format = int(pack_format_float)
-                            
-                            # 判断逻辑：
-                            # 1. 如果有3个单元格，cells[1]是Resource pack format
-                            # 2. 如果只有2个单元格：
-                            #    - 如果值<=3，这是早期版本（Data pack format不存在），cells[1]是Resource pack format
-                            #    - 如果值>3，可能是Data pack format（Resource pack被rowspan覆盖），忽略
-                            
-                            if len(cells) >= 3:
-                                # 有3个或更多单元格，cells[1]是Resource pack format
-                                current_pack_format = new_pack_format
-                                
-                                print(f"\n[行{row_idx + 1}] {version_text}")
-                                print(f"  单元格数: {len(cells)}, cells[1]='{pack_format_str}' (Resource pack)")
-                                print(f"  ✓ pack_format: {old_pack_format} -> {current_pack_format}")
-                            elif len(cells) == 2 and new_pack_format <= 3:
-                                # 只有2个单元格，但值<=3，这是早期版本（没有Data pack format）
-                                current_pack_format = new_pack_format
-                                
-                                print(f"\n[行{row_idx + 1}] {version_text}")
-                                print(f"  单元格数: {len(cells)}, cells[1]='{pack_format_str}' (早期版本，Resource pack)")
-                                print(f"  ✓ pack_format: {old_pack_format} -> {current_pack_format}")
-                            else:
-                                # 只有2个单元格且值>3，可能是Data pack format，忽略它
-                                print(f"\n[行{row_idx + 1}] {version_text}")
-                                print(f"  单元格数: {len(cells)}, cells[1]='{pack_format_str}' (可能是Data pack，忽略)")
-                                print(f"  → 保持pack_format: {current_pack_format}")
-                        except ValueError:
-                            # 无法解析为数字，可能是其他内容
-                            print(f"\n[行{row_idx + 1}] {version_text}")
-                            print(f"  单元格数: {len(cells)}")
-                            for i, cell in enumerate(cells):
-                                print(f"    cells[{i}]: {cell.get_text().strip()}")
-                            print(f"  ✗ 无法解析cells[1]='{pack_format_str}'，保持pack_format={current_pack_format}")
-                
-                # 如果有有效的pack_format，记录映射
-                if current_pack_format is not None:
-                    if current_pack_format not in pack_format_mappings:
-                        pack_format_mappings[current_pack_format] = []
-                    pack_format_mappings[current_pack_format].append(version_text)
-                    
-                    # 只在pack_format变化时输出记录信息
-                    if current_pack_format != old_pack_format:
-                        print(f"  → 开始新的pack_format组: {current_pack_format}")
-            
-            except (ValueError, TypeError, IndexError) as e:
-                print(f"\n[行{row_idx + 1}] 错误: {e}")
-                continue
+        # 按 rowspan / colspan 展开成完整的二维表格，被跨行覆盖的列也能直接读到值
+        # 每个单元格只读取一次文本，保留原有空白（如 "1.16-pre1" 不会被拆开）
+        grid = unroll_spans([
+            [
+                (_WS_RE.sub(' ', cell.get_text()).strip(), html_span(cell, 'rowspan'), html_span(cell, 'colspan'))
+                for cell in row.find_all(['td', 'th'], recursive=False)
+            ]
+            for row in rows
+        ])
+        collect_pack_formats(grid, pack_format_mappings)
     
-    # 不再合并版本，每个版本都单独保存
-    # 但我们仍然需要返回合适的格式供save_version_map使用
-    result = []
-    for pack_format in sorted(pack_format_mappings.keys()):
-        versions = pack_format_mappings[pack_format]
-        # 返回所有版本，不合并
-        for version in versions:
-            result.append((pack_format, version))
+    if pack_format_mappings:
+        save_http_cache(PAGE_CACHE_FILE, response, pack_format_mappings)
+    return pack_format_mappings
+
+def fetch_pack_format_table() -> Dict[int, List[str]]:
+    """
+    从 Minecraft Wiki 抓取 pack_format 表格
+    优先通过 API 解析 wikitext，失败时再抓取渲染后的页面
+    返回: {pack_format: [version, ...]}
+    """
+    pack_format_mappings = fetch_from_wiki_api()
     
-    pack_format_mappings = result
+    if not pack_format_mappings:
+        logger.info("未能从 wikitext 获取数据，改为抓取页面...")
+        pack_format_mappings = fetch_from_wiki_page()
     
     # 如果没有找到数据，使用备用数据
     if not pack_format_mappings:
-        print("未找到数据，使用备用数据...")
+        logger.warning("未找到数据，使用备用数据...")
         return get_fallback_data()
     
-    # 检查pack_format范围
-    pack_formats = set(pf for pf, _ in pack_format_mappings)
-    min_pf = min(pack_formats)
-    max_pf = max(pack_formats)
+    # 检查pack_format范围（字典的键本身就是去重后的pack_format）
+    min_pf = min(pack_format_mappings)
+    max_pf = max(pack_format_mappings)
     
-    print(f"\n✓ 成功获取 pack_format 范围: {min_pf} - {max_pf}")
+    logger.info("✓ 成功获取 pack_format 范围: %d - %d", min_pf, max_pf)
     
     # 检查是否获取到了早期版本（pack_format 1和2）
-    has_early_versions = any(pf <= 2 for pf in pack_formats)
-    if not has_early_versions:
-        print("⚠️ 警告：未找到pack_format 1和2的数据")
+    if min_pf > 2:
+        logger.warning("⚠️ 警告：未找到pack_format 1和2的数据")
     else:
-        print("✓ 包含早期版本（pack_format 1-3）")
+        logger.info("✓ 包含早期版本（pack_format 1-3）")
     
     return pack_format_mappings
 
-def get_fallback_data() -> List[Tuple[int, str]]:
+# 备用数据（手动维护的版本映射）
+_FALLBACK_DATA: Tuple[Tuple[int, str], ...] = (
+    (1, "1.6.1 – 1.8.9"),
+    (2, "1.9 – 1.10.2"),
+    (3, "1.11 – 1.12.2"),
+    (4, "1.13 – 1.14.4"),
+    (5, "1.15 – 1.16.1"),
+    (6, "1.16.2 – 1.16.5"),
+    (7, "1.17 – 1.17.1"),
+    (8, "1.18 – 1.18.2"),
+    (9, "1.19 – 1.19.2"),
+    (12, "1.19.3"),
+    (13, "1.19.4"),
+    (15, "1.20 – 1.20.1"),
+    (18, "1.20.2"),
+    (22, "1.20.3 – 1.20.4"),
+    (32, "1.20.5 – 1.20.6"),
+    (34, "1.21 – 1.21.1"),
+    (42, "1.21.2 – 1.21.3"),
+    (46, "1.21.4"),
+    (55, "1.21.5"),
+    (63, "1.21.6"),
+    (64, "1.21.7 – 1.21.8"),
+)
+
+def get_fallback_data() -> Dict[int, List[str]]:
     """
     备用数据（手动维护的版本映射）
     """
-    return [
-        (1, "1.6.1 – 1.8.9"),
-        (2, "1.9 – 1.10.2"),
-        (3, "1.11 – 1.12.2"),
-        (4, "1.13 – 1.14.4"),
-        (5, "1.15 – 1.16.1"),
-        (6, "1.16.2 – 1.16.5"),
-        (7, "1.17 – 1.17.1"),
-        (8, "1.18 – 1.18.2"),
-        (9, "1.19 – 1.19.2"),
-        (12, "1.19.3"),
-        (13, "1.19.4"),
-        (15, "1.20 – 1.20.1"),
-        (18, "1.20.2"),
-        (22, "1.20.3 – 1.20.4"),
-        (32, "1.20.5 – 1.20.6"),
-        (34, "1.21 – 1.21.1"),
-        (42, "1.21.2 – 1.21.3"),
-        (46, "1.21.4"),
-        (55, "1.21.5"),
-        (63, "1.21.6"),
-        (64, "1.21.7 – 1.21.8"),
-    ]
-
-def save_version_map(mappings: List[Tuple[int, str]], output_file: str = "version_map.json"):
+    return {pack_format: [version] for pack_format, version in _FALLBACK_DATA}
+
+def save_version_map(mappings: Dict[int, List[str]], output_file: str = str(VERSION_MAP_FILE)):
     """
     保存版本映射到 JSON 文件
     格式: { "pack_format": ["version1", "version2", ...] }
     """
-    # 构建pack_format到版本列表的映射
-    pack_format_to_versions = {}
-    for pack_format, version in mappings:
-        if pack_format not in pack_format_to_versions:
-            pack_format_to_versions[pack_format] = []
-        pack_format_to_versions[pack_format].append(version)
-    
-    # 转换为字典格式
+    # 转换为字典格式，并附带时间戳
     version_map = {
         "resource_pack": {
             str(pack_format): versions
-            for pack_format, versions in sorted(pack_format_to_versions.items())
+            for pack_format, versions in sorted(mappings.items())
         },
-        "last_updated": None
+        "last_updated": datetime.now().isoformat()
     }
     
-    # 添加时间戳
-    from datetime import datetime
-    version_map["last_updated"] = datetime.now().isoformat()
-    
-    # 保存到文件
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(version_map, f, indent=2, ensure_ascii=False)
+    # 保存到文件（键已按 pack_format 数值排序，不能再用 OPT_SORT_KEYS 按字符串重排）
+    if orjson is not None:
+        with open(output_file, 'wb') as f:
+            f.write(orjson.dumps(version_map, option=orjson.OPT_INDENT_2))
+    else:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(version_map, f, indent=2, ensure_ascii=False)
     
     print(f"\n版本映射已保存到: {output_file}")
     
     # 统计信息
-    total_versions = sum(len(versions) for versions in pack_format_to_versions.values())
-    print(f"共 {len(pack_format_to_versions)} 个pack_format组")
+    total_versions = sum(len(versions) for versions in mappings.values())
+    print(f"共 {len(mappings)} 个pack_format组")
     print(f"共 {total_versions} 个版本")
 
 def main():
+    # 默认只输出进度信息，加 -v/--verbose 参数输出逐行解析日志
+    verbose = '-v' in sys.argv[1:] or '--verbose' in sys.argv[1:]
+    logging.basicConfig(level=logging.DEBUG if verbose else logging.INFO, format='%(message)s')
+    # httpx / httpcore 会为每个请求输出日志，这里只保留警告
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+    logging.getLogger('httpcore').setLevel(logging.WARNING)
+    
     print("=" * 60)
     print("Minecraft Pack Format 版本映射抓取工具")
     print("=" * 60)